@@ -5,263 +5,575 @@ ENSAI 2026
 Version Python 3.11
 """
 
-import urllib.request
 import urllib.parse
 import urllib.robotparser
-from urllib.error import HTTPError, URLError
-from bs4 import BeautifulSoup
-import json
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+import orjson
 import time
-from queue import PriorityQueue
-import ssl
+import functools
+import itertools
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import asyncio
+import aiohttp
+from pybloom_live import ScalableBloomFilter
+
+
+USER_AGENT = 'Mozilla/5.0 (WebCrawler ENSAI)'
+
+# Ports implicites, retires lors de la canonicalisation
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Duree de validite d'un robots.txt en cache, et taille maximale lue
+ROBOTS_TTL = 6 * 3600
+ROBOTS_MAX_BYTES = 500 * 1024
+
+# Taille maximale d'une page HTML telechargee
+MAX_RESPONSE_BYTES = 2 * 1024 * 1024
+
+# Seules ces balises sont utiles: le reste du document n'est pas construit
+PAGE_STRAINER = SoupStrainer(['title', 'p', 'a'])
+
+# Liens ignores (javascript, e-mail, telephone, ancres internes)
+SKIP_LINK_PREFIXES = ('javascript:', 'mailto:', 'tel:', '#')
+
+# URLs a visiter en priorite (une seule alternation si d'autres motifs s'ajoutent)
+PRIORITY_RE = re.compile(r'product', re.IGNORECASE)
+
+# Lien absolu (avec schema) et fragment a retirer
+ABSOLUTE_URL_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.\-]*:')
+FRAGMENT_RE = re.compile(r'#.*$', re.DOTALL)
+
+# Parametres de suivi qui ne changent pas le contenu de la page
+TRACKING_PARAM_RE = re.compile(r'^(utm_.*|gclid|fbclid)$', re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class PageResult:
+    """
+    Contenu extrait d'une page visitee. Les liens sont des tuples
+    (url, texte) avec l'URL internee, partagee entre toutes les pages
+    """
+    title: str
+    url: str
+    first_paragraph: str
+    links: list
+
+    def as_dict(self):
+        """
+        Forme JSON de la page (liens sous forme {'url', 'text'})
+        """
+        return {
+            'title': self.title,
+            'url': self.url,
+            'first_paragraph': self.first_paragraph,
+            'links': [{'url': link_url, 'text': link_text} for link_url, link_text in self.links]
+        }
+
+
+async def read_body(response, max_bytes):
+    """
+    Lit le corps d'une reponse par morceaux et s'arrete des que max_bytes
+    est depasse: le resultat fait au plus max_bytes + 1 octets
+    """
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        body += chunk
+        if len(body) > max_bytes:
+            break
+    return bytes(body[:max_bytes + 1])
+
+
+def canonicalize_url(url):
+    """
+    Ramene une URL a une forme canonique pour que les variantes d'une
+    meme page (casse de l'hote, port par defaut, ordre des parametres,
+    fragment, slash final, parametres de suivi) ne soient visitees qu'une fois
+    """
+    try:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        netloc = parts.hostname or ''
+        # hostname perd les crochets d'une adresse IPv6: on les remet
+        if ':' in netloc:
+            netloc = '[' + netloc + ']'
+        if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+            netloc += ':' + str(parts.port)
+    except ValueError:
+        return url
+
+    if parts.username:
+        userinfo = parts.username + (':' + parts.password if parts.password else '')
+        netloc = userinfo + '@' + netloc
+
+    # Normaliser le chemin: '//' fusionnes, '.' et '..' resolus, pas de '/' final
+    segments = []
+    for segment in parts.path.split('/'):
+        if segment in ('', '.'):
+            continue
+        if segment == '..':
+            if segments:
+                segments.pop()
+            continue
+        segments.append(segment)
+    path = '/' + '/'.join(segments)
+
+    # Parametres tries tels quels: une cle nue ('?flag') reste sans '='
+    params = [param.partition('=')
+              for param in parts.query.split('&')
+              if param and not TRACKING_PARAM_RE.match(urllib.parse.unquote_plus(param.partition('=')[0]))]
+    query = '&'.join(''.join(param) for param in sorted(params, key=lambda param: (param[0], param[2])))
+
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, ''))
+
+
+@functools.lru_cache(maxsize=None)
+def site_pattern(base_domain):
+    """
+    Regex d'un lien absolu pointant vers le site crawle (http ou https)
+    """
+    return re.compile(r'^https?://' + re.escape(base_domain) + r'(?=[/?]|$)', re.IGNORECASE)
+
+
+def extract_content(html_content, url, base_domain):
+    """
+    Extrait le titre, premier paragraphe et liens d'une page HTML servie
+    a l'URL url, qui doit etre sur base_domain (seuls les liens du site sont
+    gardes). Fonction pure (sans self) pour pouvoir tourner dans un processus
+    du ProcessPoolExecutor
+    """
+    soup = BeautifulSoup(html_content, 'lxml', parse_only=PAGE_STRAINER)
+
+    title_tag = soup.find('title')
+    title = title_tag.text.strip() if title_tag else "Sans titre"
+
+    # Un seul parcours: premier paragraphe assez long, sinon le tout premier
+    first_paragraph = ""
+    first_any = None
+    for p in soup.find_all('p'):
+        text = p.text.strip()
+        if first_any is None:
+            first_any = text
+        if len(text) > 20:
+            first_paragraph = text
+            break
+    first_paragraph = first_paragraph or first_any or ""
+
+    links = []
+    base_scheme = url.split(':', 1)[0]
+    site_prefix = base_scheme + '://' + base_domain
+    site_re = site_pattern(base_domain)
+    for link_tag in soup.find_all('a', href=True):
+        link_url = link_tag['href'].strip()
+        link_text = link_tag.text.strip()[:100]
+
+        # Eviter les liens vides ou javascript
+        if not link_url or link_url.startswith(SKIP_LINK_PREFIXES):
+            continue
+
+        link_url = FRAGMENT_RE.sub('', link_url)
+        if link_url.startswith('//'):
+            link_url = base_scheme + ':' + link_url
+
+        # Cas courants traites sans urljoin: lien absolu (garde seulement
+        # s'il vise le site) ou lien relatif a la racine
+        if ABSOLUTE_URL_RE.match(link_url):
+            if not site_re.match(link_url):
+                continue
+            full_link = link_url
+        elif link_url.startswith('/'):
+            full_link = site_prefix + link_url
+        else:
+            full_link = urllib.parse.urljoin(url, link_url)
+            # Un lien relatif ne reste sur le site que si la page servie y est
+            # (une redirection peut mener ailleurs): verification peu couteuse
+            if not site_re.match(full_link):
+                continue
+
+        # Lien garde tel que resolu: seule la cle de deduplication est canonique
+        links.append((full_link, link_text if link_text else "Lien sans texte"))
+
+    return PageResult(title, url, first_paragraph, links)
+
+
+class VisitedUrls:
+    """
+    Ensemble des URLs visitees: exact jusqu'a `threshold` URLs, puis
+    complete par un filtre de Bloom pour borner la memoire sur les gros crawls
+    """
+
+    def __init__(self, capacity=10000, threshold=10000, error_rate=1e-4):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.error_rate = error_rate
+        self.exact = set()
+        self.bloom = None
+
+    def add(self, url):
+        if self.bloom is not None:
+            self.bloom.add(url)
+        elif len(self.exact) < self.threshold:
+            self.exact.add(url)
+        else:
+            # Un faux positif fait seulement manquer une URL, acceptable ici
+            self.bloom = ScalableBloomFilter(
+                initial_capacity=self.capacity,
+                error_rate=self.error_rate,
+                mode=ScalableBloomFilter.LARGE_SET_GROWTH
+            )
+            self.bloom.add(url)
+
+    def __contains__(self, url):
+        if url in self.exact:
+            return True
+        return self.bloom is not None and url in self.bloom
+
+    def __len__(self):
+        return len(self.exact) + (len(self.bloom) if self.bloom is not None else 0)
 
 
 class WebCrawler:
-    def __init__(self, start_url, max_pages=50, delay=1):
+    def __init__(self, start_url, max_pages=50, delay=1, concurrency=8, stream_file=None):
         """
-        Initialise le crawler avec l'URL de depart
+        Initialise le crawler avec l'URL de depart.
+        Si stream_file est donne, chaque page est ecrite au fil du crawl dans
+        ce fichier JSON Lines au lieu d'etre gardee en memoire dans results
         """
         self.start_url = start_url
-        parsed_url = urllib.parse.urlparse(start_url)
+        parsed_url = urllib.parse.urlparse(canonicalize_url(start_url))
         self.base_domain = parsed_url.netloc or parsed_url.hostname
         self.max_pages = max_pages
         self.delay = delay
+        self.concurrency = concurrency
+
+        # File d'attente prioritaire (partagee par les workers asyncio).
+        # Les entrees sont (priorite, ordre d'ajout, url): le compteur departage
+        # les egalites sans comparer les URLs et garde l'ordre d'ajout (FIFO)
+        self.url_queue = asyncio.PriorityQueue()
+        self.queue_counter = itertools.count()
 
-        # File d'attente prioritaire
-        self.url_queue = PriorityQueue()
+        # URLs deja visitees (dimensionne sur ~100 liens par page)
+        self.visited_urls = VisitedUrls(capacity=max(max_pages * 100, 10000))
 
-        # URLs deja visitees
-        self.visited_urls = set()
+        # URLs en attente dans la file (evite de parcourir la file a chaque ajout)
+        self.queued_urls = set()
 
         # Resultats stockes
         self.results = []
+        self.pages_crawled = 0
+        self.stream_file = stream_file
+        self._stream = None
+
+        # Parsers robots.txt par hote: host -> (parser ou None, date de chargement)
+        self._robots_cache = {}
+        self._robots_lock = asyncio.Lock()
 
-        # Parser pour robots.txt
-        self.robot_parser = urllib.robotparser.RobotFileParser()
-        self.robots_txt_loaded = False
+        # Reponses de robots.txt memorisees par (hote, chemin)
+        self._robots_allowed = functools.lru_cache(maxsize=8192)(self._check_robots)
 
-    def fetch_robots_txt(self):
+        # Session HTTP aiohttp, ouverte le temps du crawl
+        self.session = None
+
+        # Processus dedies a l'analyse HTML, crees le temps du crawl
+        self._parse_pool = None
+
+        # Politesse par hote: date (time.monotonic) a partir de laquelle
+        # la prochaine requete vers cet hote est autorisee
+        self._next_ok = {}
+
+    async def fetch_robots_txt(self, host):
         """
-        Recupere et parse le fichier robots.txt du site
+        Recupere et parse le fichier robots.txt d'un hote
+        Retourne None si le fichier n'a pas pu etre lu
         """
-        robots_url = "https://" + self.base_domain + "/robots.txt"
-        self.robot_parser.set_url(robots_url)
+        robots_url = "https://" + host + "/robots.txt"
         try:
-            # Creer un contexte SSL qui ignore la verification
-            context = ssl._create_unverified_context()
-            # Utiliser urllib.request pour contourner l'erreur SSL
-            req = urllib.request.Request(robots_url, headers={'User-Agent': 'Mozilla/5.0'})
-            response = urllib.request.urlopen(req, context=context, timeout=10)
-            content = response.read().decode('utf-8', errors='ignore')
+            async with self.session.get(robots_url) as response:
+                response.raise_for_status()
+
+                # Taille limitee comme chez Google: le reste du fichier est ignore
+                content = (await read_body(response, ROBOTS_MAX_BYTES))[:ROBOTS_MAX_BYTES]
 
             # Parser le contenu manuellement
-            self.robot_parser.parse(content.splitlines())
-            self.robots_txt_loaded = True
+            robot_parser = urllib.robotparser.RobotFileParser(robots_url)
+            robot_parser.parse(content.decode('utf-8', errors='ignore').splitlines())
             print("robots.txt recupere depuis " + robots_url)
+            return robot_parser
         except Exception as e:
             print("Impossible de lire robots.txt (on continue sans): " + str(e))
-            self.robots_txt_loaded = False
+            return None
 
-    def can_fetch(self, url):
+    async def _get_robot(self, host):
         """
-        Verifie si le crawler peut acceder a l'URL selon robots.txt
+        Retourne le parser robots.txt de l'hote depuis le cache,
+        et le recharge une fois le TTL expire
         """
-        if not self.robots_txt_loaded:
+        async with self._robots_lock:
+            cached = self._robots_cache.get(host)
+            if cached is not None and time.monotonic() - cached[1] < ROBOTS_TTL:
+                return cached[0]
+
+            robot_parser = await self.fetch_robots_txt(host)
+            self._robots_cache[host] = (robot_parser, time.monotonic())
+
+            # Les reponses memorisees pour l'ancien robots.txt ne sont plus valables
+            self._robots_allowed.cache_clear()
+            return robot_parser
+
+    def _check_robots(self, host, path):
+        """
+        Applique les regles robots.txt deja chargees pour l'hote
+        """
+        robot_parser = self._robots_cache[host][0]
+        if robot_parser is None:
             return True  # Si robots.txt n'est pas charge, on continue
 
         try:
-            return self.robot_parser.can_fetch("*", url)
+            return robot_parser.can_fetch("*", path)
         except:
             return True
 
-    def make_request(self, url):
+    async def can_fetch(self, url):
         """
-        Effectue une requete HTTP avec gestion d'erreurs et politesse
+        Verifie si le crawler peut acceder a l'URL selon robots.txt
         """
-        time.sleep(self.delay)
+        parts = urllib.parse.urlsplit(url)
+        await self._get_robot(parts.netloc)
 
-        try:
-            # Creer un contexte SSL qui ignore la verification des certificats
-            context = ssl._create_unverified_context()
+        path = parts.path + ('?' + parts.query if parts.query else '')
+        return self._robots_allowed(parts.netloc, path)
 
-            headers = {'User-Agent': 'Mozilla/5.0 (WebCrawler ENSAI)'}
-            req = urllib.request.Request(url, headers=headers)
-            response = urllib.request.urlopen(req, timeout=10, context=context)
-
-            content_type = response.getheader('Content-Type', '')
-            if 'text/html' not in content_type:
-                print("  -> Contenu non HTML: " + content_type)
-                return None
+    async def wait_turn(self, host):
+        """
+        Reserve le prochain creneau de requete pour l'hote et attend qu'il
+        arrive. Aucune attente si le delai est deja ecoule (premiere requete,
+        ou telechargement precedent plus long que le delai)
+        """
+        cached = self._robots_cache.get(host)
+        robot_parser = cached[0] if cached else None
+        crawl_delay = robot_parser.crawl_delay("*") if robot_parser else None
+        interval = max(self.delay, crawl_delay or 0)
 
-            html_bytes = response.read()
+        # Pas d'await entre la lecture et l'ecriture: la reservation est atomique
+        now = time.monotonic()
+        start = max(now, self._next_ok.get(host, now))
+        self._next_ok[host] = start + interval
 
-            # Essayer differents encodages
-            encodings = ['utf-8', 'iso-8859-1', 'windows-1252']
-            for encoding in encodings:
-                try:
-                    return html_bytes.decode(encoding)
-                except UnicodeDecodeError:
-                    continue
+        if start > now:
+            await asyncio.sleep(start - now)
 
-            # Si aucun encoding ne fonctionne
-            return html_bytes.decode('utf-8', errors='ignore')
+    async def make_request(self, url):
+        """
+        Effectue une requete HTTP avec gestion d'erreurs et politesse.
+        Retourne (contenu, URL finale apres redirections) ou None
+        """
+        await self.wait_turn(urllib.parse.urlsplit(url).netloc)
 
-        except HTTPError as e:
-            print("  -> Erreur HTTP: " + str(e.code))
+        try:
+            async with self.session.get(url) as response:
+                if response.status >= 400:
+                    print("  -> Erreur HTTP: " + str(response.status))
+                    return None
+
+                content_type = response.headers.get('Content-Type', '')
+                if 'text/html' not in content_type:
+                    print("  -> Contenu non HTML: " + content_type)
+                    return None
+
+                # Taille annoncee trop grande: on abandonne avant de telecharger
+                if response.content_length is not None and response.content_length > MAX_RESPONSE_BYTES:
+                    print("  -> Page trop volumineuse: " + str(response.content_length) + " octets")
+                    response.close()
+                    return None
+
+                html_bytes = await read_body(response, MAX_RESPONSE_BYTES)
+                if len(html_bytes) > MAX_RESPONSE_BYTES:
+                    print("  -> Page trop volumineuse (> " + str(MAX_RESPONSE_BYTES) + " octets)")
+                    response.close()
+                    return None
+
+                # Les octets bruts sont passes tels quels a lxml, qui detecte l'encodage
+                return html_bytes, str(response.url)
+
+        except aiohttp.ClientError as e:
+            print("  -> Erreur URL: " + str(e))
             return None
-        except URLError as e:
-            print("  -> Erreur URL: " + str(e.reason))
+        except asyncio.TimeoutError:
+            print("  -> Erreur: delai depasse")
             return None
         except Exception as e:
             print("  -> Erreur: " + str(e))
             return None
 
-    def extract_content(self, html_content, url):
-        """
-        Extrait le titre, premier paragraphe et liens d'une page HTML
-        """
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        title_tag = soup.find('title')
-        title = title_tag.text.strip() if title_tag else "Sans titre"
-
-        first_paragraph = ""
-        for p in soup.find_all('p'):
-            text = p.text.strip()
-            if text and len(text) > 20:
-                first_paragraph = text
-                break
-
-        if not first_paragraph:
-            first_p = soup.find('p')
-            if first_p:
-                first_paragraph = first_p.text.strip()
-
-        links = []
-        body = soup.find('body')
-        if body:
-            for link_tag in body.find_all('a', href=True):
-                link_url = link_tag['href']
-                link_text = link_tag.text.strip()[:100]
-
-                # Eviter les liens vides ou javascript
-                if not link_url or link_url.startswith(('javascript:', 'mailto:', 'tel:', '#')):
-                    continue
-
-                full_link = urllib.parse.urljoin(url, link_url)
-
-                parsed_link = urllib.parse.urlparse(full_link)
-                if parsed_link.netloc and parsed_link.netloc != self.base_domain:
-                    continue
-
-                # Nettoyer l'URL (enlever les fragments #)
-                clean_link = urllib.parse.urlunparse((
-                    parsed_link.scheme,
-                    parsed_link.netloc,
-                    parsed_link.path,
-                    parsed_link.params,
-                    parsed_link.query,
-                    ''  # Supprimer le fragment
-                ))
-
-                links.append({
-                    'url': clean_link,
-                    'text': link_text if link_text else "Lien sans texte"
-                })
-
-        return {
-            'title': title,
-            'url': url,
-            'first_paragraph': first_paragraph,
-            'links': links
-        }
-
-    def get_priority(self, url):
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def get_priority(url):
         """
         Attribue une priorite a une URL
         Priorite plus basse = plus haute priorite
         """
-        if 'product' in url.lower():
+        if PRIORITY_RE.search(url):
             return 0
         return 1
 
     def add_url_to_queue(self, url):
         """
-        Ajoute une URL a la file d'attente avec priorite
+        Ajoute une URL a la file d'attente avec priorite. L'URL est mise en
+        file telle quelle; sa forme canonique sert seulement a deduplication.
+        Retourne True si l'URL a ete ajoutee
         """
-        if url in self.visited_urls:
-            return
-
-        # Verifier si l'URL est deja dans la file
-        for item in list(self.url_queue.queue):
-            if item[1] == url:
-                return
+        key = canonicalize_url(url)
+        if key in self.visited_urls or key in self.queued_urls:
+            return False
 
         priority = self.get_priority(url)
-        self.url_queue.put((priority, url))
+        self.url_queue.put_nowait((priority, next(self.queue_counter), url))
+        self.queued_urls.add(key)
+        return True
 
-    def crawl(self):
+    async def process_url(self, priority, current_url):
         """
-        Fonction principale qui execute le crawling
+        Telecharge une URL, extrait son contenu et ajoute ses liens a la file
         """
-        print("Debut du crawling a partir de: " + self.start_url)
-        print("Maximum " + str(self.max_pages) + " pages a visiter")
+        # Verifier que l'URL n'a pas deja ete visitee (double verification)
+        key = canonicalize_url(current_url)
+        if key in self.visited_urls or self.pages_crawled >= self.max_pages:
+            return
 
-        # Essayer de recuperer robots.txt, mais continuer meme en cas d'echec
-        print("Tentative de recuperation de robots.txt...")
-        self.fetch_robots_txt()
+        self.visited_urls.add(key)
 
-        if not self.robots_txt_loaded:
-            print("ATTENTION: robots.txt non charge. Le crawler continuera sans restrictions.")
+        # Verifier robots.txt (retourne True si non charge)
+        if not await self.can_fetch(current_url):
+            print("\n" + current_url + "\n   -> Bloque par robots.txt")
+            return
 
-        self.add_url_to_queue(self.start_url)
+        response = await self.make_request(current_url)
 
-        pages_crawled = 0
+        if not response:
+            print("\n" + current_url + "\n   -> ECHEC: impossible de recuperer la page")
+            return
 
-        while not self.url_queue.empty() and pages_crawled < self.max_pages:
-            priority, current_url = self.url_queue.get()
+        # Les liens relatifs se resolvent par rapport a l'URL reellement
+        # servie (apres redirections), pas par rapport a sa forme canonique
+        html_content, fetched_url = response
+        fetched_key = canonicalize_url(fetched_url)
+        self.visited_urls.add(fetched_key)
 
-            # Verifier que l'URL n'a pas deja ete visitee (double verification)
-            if current_url in self.visited_urls:
-                continue
+        # Une redirection hors du site: ni la page ni ses liens ne sont gardes
+        # (extract_content suppose une page servie par base_domain)
+        if urllib.parse.urlsplit(fetched_key).netloc != self.base_domain:
+            print("\n" + current_url + "\n   -> Redirige hors du site: " + fetched_url)
+            return
 
-            self.visited_urls.add(current_url)
+        # L'analyse HTML (CPU) tourne dans un autre processus pendant que
+        # la boucle d'evenements continue de telecharger les pages suivantes
+        loop = asyncio.get_running_loop()
+        page_data = await loop.run_in_executor(
+            self._parse_pool, extract_content, html_content, fetched_url, self.base_domain
+        )
 
-            print("\n[" + str(pages_crawled + 1) + "/" + str(self.max_pages) + "] " + current_url)
-            print("   Priorite: " + str(priority))
+        # D'autres workers ont pu atteindre la limite pendant le telechargement
+        if self.pages_crawled >= self.max_pages:
+            return
 
-            # Verifier robots.txt (retourne True si non charge)
-            if not self.can_fetch(current_url):
-                print("   -> Bloque par robots.txt")
-                continue
+        # Les chaines reviennent du processus d'analyse sous forme de copies:
+        # on interne les URLs ici pour n'en garder qu'une instance par URL
+        page_data.links = [(sys.intern(link_url), link_text) for link_url, link_text in page_data.links]
+
+        if self._stream is not None:
+            self._stream.write(orjson.dumps(page_data.as_dict()) + b'\n')
+        else:
+            self.results.append(page_data)
+
+        # Ajouter les nouveaux liens a la file
+        new_links_count = 0
+        for link_url, _ in page_data.links:
+            if self.add_url_to_queue(link_url):
+                new_links_count += 1
+
+        self.pages_crawled += 1
+        print("\n[" + str(self.pages_crawled) + "/" + str(self.max_pages) + "] " + current_url)
+        print("   Priorite: " + str(priority))
+        print("   -> OK: " + str(len(page_data.links)) + " liens trouves (" + str(new_links_count) + " nouveaux)")
+
+    async def worker(self):
+        """
+        Consomme la file d'attente jusqu'a annulation
+        """
+        while True:
+            priority, _, current_url = await self.url_queue.get()
+            self.queued_urls.discard(canonicalize_url(current_url))
+            try:
+                await self.process_url(priority, current_url)
+            except Exception as e:
+                print("\n" + current_url + "\n   -> Erreur: " + str(e))
+            finally:
+                self.url_queue.task_done()
+
+    async def crawl(self):
+        """
+        Fonction principale qui execute le crawling
+        """
+        print("Debut du crawling a partir de: " + self.start_url)
+        print("Maximum " + str(self.max_pages) + " pages a visiter")
+
+        if self.stream_file:
+            self._stream = open(self.stream_file, 'wb')
+
+        try:
+            await self._crawl_session()
+        finally:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+        print("\nCrawling termine. " + str(self.pages_crawled) + " pages visitees.")
+
+    async def _crawl_session(self):
+        """
+        Deroule le crawl dans une session aiohttp
+        """
+        # Resolutions DNS gardees 5 minutes: pas de getaddrinfo a chaque page
+        connector = aiohttp.TCPConnector(limit=20, limit_per_host=4, ssl=False, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=10)
+        # Reponses compressees: aiohttp les decompresse de maniere transparente
+        # (br necessite le paquet Brotli)
+        headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate, br'}
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            self.session = session
 
-            html_content = self.make_request(current_url)
+            # Essayer de recuperer robots.txt, mais continuer meme en cas d'echec
+            print("Tentative de recuperation de robots.txt...")
+            if await self._get_robot(self.base_domain) is None:
+                print("ATTENTION: robots.txt non charge. Le crawler continuera sans restrictions.")
 
-            if html_content:
-                page_data = self.extract_content(html_content, current_url)
-                self.results.append(page_data)
+            self.add_url_to_queue(self.start_url)
 
-                # Ajouter les nouveaux liens a la file
-                new_links_count = 0
-                for link in page_data['links']:
-                    if link['url'] not in self.visited_urls:
-                        self.add_url_to_queue(link['url'])
-                        new_links_count += 1
+            # Les workers se partagent la file; join() rend la main quand
+            # toutes les URLs ajoutees ont ete traitees
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as parse_pool:
+                self._parse_pool = parse_pool
+                workers = [asyncio.create_task(self.worker()) for _ in range(self.concurrency)]
+                await self.url_queue.join()
 
-                pages_crawled += 1
-                print("   -> OK: " + str(len(page_data['links'])) + " liens trouves (" + str(new_links_count) + " nouveaux)")
-            else:
-                print("   -> ECHEC: impossible de recuperer la page")
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+            self._parse_pool = None
 
-        print("\nCrawling termine. " + str(len(self.results)) + " pages visitees.")
+        self.session = None
 
     def save_results(self, filename="crawler_results.json"):
         """
         Sauvegarde les resultats dans un fichier JSON
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.results, f, ensure_ascii=False, indent=2)
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps([page.as_dict() for page in self.results], option=orjson.OPT_INDENT_2))
             print("\nResultats sauvegardes dans " + filename)
             return True
         except Exception as e:
@@ -280,7 +592,7 @@ def main():
         delay=0.5
     )
 
-    crawler.crawl()
+    asyncio.run(crawler.crawl())
     crawler.save_results()
 
     print("\n" + "="*50)
@@ -290,27 +602,27 @@ def main():
 
     if crawler.results:
         product_pages = sum(1 for page in crawler.results
-                           if 'product' in page['url'].lower())
+                           if 'product' in page.url.lower())
         print("Pages produits: " + str(product_pages))
 
         print("\nURLs visitees:")
         for i, page in enumerate(crawler.results, 1):
-            product_indicator = " [PRODUIT]" if 'product' in page['url'].lower() else ""
-            print(str(i).rjust(3) + ". " + page['url'] + product_indicator)
+            product_indicator = " [PRODUIT]" if 'product' in page.url.lower() else ""
+            print(str(i).rjust(3) + ". " + page.url + product_indicator)
 
         print("\n" + "="*50)
         print("PREMIER RESULTAT DETAILLE")
         print("="*50)
         first_result = crawler.results[0]
-        print("Titre: " + first_result['title'])
-        print("URL: " + first_result['url'])
-        print("Premier paragraphe: " + first_result['first_paragraph'][:200] + "...")
-        print("Nombre de liens trouves: " + str(len(first_result['links'])))
+        print("Titre: " + first_result.title)
+        print("URL: " + first_result.url)
+        print("Premier paragraphe: " + first_result.first_paragraph[:200] + "...")
+        print("Nombre de liens trouves: " + str(len(first_result.links)))
 
-        if first_result['links']:
+        if first_result.links:
             print("\n5 premiers liens:")
-            for i, link in enumerate(first_result['links'][:5], 1):
-                print("  " + str(i) + ". " + link['text'][:50] + "... -> " + link['url'])
+            for i, (link_url, link_text) in enumerate(first_result.links[:5], 1):
+                print("  " + str(i) + ". " + link_text[:50] + "... -> " + link_url)
     else:
         print("Aucune page visitee. Verifiez la connexion Internet et les permissions.")
 
@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from crawler import WebCrawler, canonicalize_url, extract_content
+
+
+class CanonicalizeUrlTest(unittest.TestCase):
+    def test_variants_share_one_form(self):
+        self.assertEqual(canonicalize_url('HTTP://Example.com:80/a//b/./c/../?b=2&utm_source=x&a=1#top'),
+                         'http://example.com/a/b?a=1&b=2')
+
+    def test_ipv6_host_keeps_brackets(self):
+        self.assertEqual(canonicalize_url('http://[::1]:8080/docs/'), 'http://[::1]:8080/docs')
+
+    def test_bare_query_key_is_kept(self):
+        self.assertEqual(canonicalize_url('http://example.com/?flag&q=a%20b'),
+                         'http://example.com/?flag&q=a%20b')
+
+
+class ExtractContentTest(unittest.TestCase):
+    HTML = (b'<title>Docs</title><a href="page2">p2</a><a href="/top">top</a>'
+            b'<a href="http://other.com/x">ext</a><a href="#frag">anchor</a>')
+
+    def test_relative_links_resolve_against_the_served_url(self):
+        page = extract_content(self.HTML, 'http://example.com/docs/', 'example.com')
+        self.assertEqual([link for link, _ in page.links],
+                         ['http://example.com/docs/page2', 'http://example.com/top'])
+
+    def test_relative_links_of_an_off_site_page_are_dropped(self):
+        page = extract_content(self.HTML, 'http://other.com/docs/', 'example.com')
+        self.assertEqual([link for link, _ in page.links], ['http://example.com/top'])
+
+
+class ProcessUrlTest(unittest.IsolatedAsyncioTestCase):
+    async def test_redirect_off_site_is_not_followed(self):
+        crawler = WebCrawler('http://127.0.0.1:8766/', max_pages=10, delay=0)
+        html = b'<title>Ext</title><a href="next.html">next</a>'
+        with mock.patch.object(crawler, 'can_fetch', mock.AsyncMock(return_value=True)), \
+                mock.patch.object(crawler, 'make_request',
+                                  mock.AsyncMock(return_value=(html, 'http://localhost:8766/ext/page.html'))):
+            await crawler.process_url(1, 'http://127.0.0.1:8766/out')
+
+        self.assertEqual(crawler.results, [])
+        self.assertEqual(crawler.pages_crawled, 0)
+        self.assertTrue(crawler.url_queue.empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from itertools import chain
+from unittest import mock
+
+import tp2
+from tp2 import IndexBuilder
+
+
+class IterJsonlTest(unittest.TestCase):
+    def setUp(self):
+        self.builder = IndexBuilder()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, name: str, content: bytes) -> str:
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_malformed_line_raises_json_error(self):
+        path = self.write('bad.jsonl', b'{"url": "a"}\n{"url": \n')
+        with self.assertRaises(json.JSONDecodeError):
+            self.builder.parse_jsonl(path)
+
+    def test_blank_lines_and_empty_file(self):
+        path = self.write('blank.jsonl', b'{"url": "a"}\n\n  \n{"url": "b"}')
+        self.assertEqual(self.builder.parse_jsonl(path), [{'url': 'a'}, {'url': 'b'}])
+        self.assertEqual(self.builder.parse_jsonl(self.write('empty.jsonl', b'')), [])
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), "named pipes not available")
+    def test_named_pipe_is_streamed(self):
+        path = os.path.join(self.tmpdir.name, 'pipe.jsonl')
+        os.mkfifo(path)
+
+        def feed():
+            with open(path, 'wb') as f:
+                f.write(b'{"url": "a"}\n{"url": "b"}\n')
+
+        writer = threading.Thread(target=feed)
+        writer.start()
+        try:
+            self.assertEqual(self.builder.parse_jsonl(path), [{'url': 'a'}, {'url': 'b'}])
+        finally:
+            writer.join()
+
+    def test_read_ahead_error_is_raised(self):
+        path = self.write('large.jsonl', b'{"url": "a"}\n' * 100)
+        real_open = open
+
+        class FailingFile:
+            def __init__(self, *args, **kwargs):
+                self.file = real_open(*args, **kwargs)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.file.close()
+
+            def fileno(self):
+                return self.file.fileno()
+
+            def read(self, size=-1):
+                raise OSError("disk error")
+
+        # Force the read-ahead path, with a file whose reads fail
+        with mock.patch.object(tp2, '_PREFETCH_MIN_BYTES', 0), \
+                mock.patch.object(tp2, 'open', FailingFile, create=True):
+            with self.assertRaises(OSError):
+                self.builder.parse_jsonl(path)
+
+
+class BuildIndexTest(unittest.TestCase):
+    INPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'input', 'products.jsonl')
+
+    def setUp(self):
+        self.builder = IndexBuilder()
+        self.documents = self.builder.parse_jsonl(self.INPUT)[:50]
+
+    def test_create_index_accepts_iterators(self):
+        for name in dir(self.builder):
+            if name.startswith('create_') and name.endswith('_index'):
+                create = getattr(self.builder, name)
+                with self.subTest(name):
+                    self.assertEqual(create(iter(self.documents)), create(self.documents))
+
+    def test_feature_phrase_surrounds_first_occurrence(self):
+        doc = {'url': 'u', 'description': 'A  very   waterproof\tjacket, waterproof.',
+               'product_features': {'Care': 'hand-washable'}}
+        self.assertEqual(self.builder.create_features_index([doc]),
+                         {'very waterproof jacket,': ['u'], 'hand-washable a': ['u']})
+
+    def test_title_brand_kept_only_when_a_feature_names_it(self):
+        docs = [{'url': 'a', 'title': 'Acme boots', 'product_features': {'Brand': 'Acme'}},
+                {'url': 'b', 'title': 'Acme shoes'},
+                {'url': 'c', 'title': 'Nameless socks'}]
+        expected = {'acme': ['a', 'b']}
+        self.assertEqual(self.builder.create_brand_index(docs), expected)
+        self.assertEqual(self.builder.build_all_indexes(docs)[0], expected)
+
+    def test_encode_position_index_on_a_fresh_builder(self):
+        title_index = self.builder.create_title_position_index(self.documents)
+        doc_ids = IndexBuilder.assign_doc_ids(chain.from_iterable(title_index.values()))
+        encoded = self.builder.encode_position_index(title_index, doc_ids)
+        self.assertEqual(self.builder.decode_position_index(encoded, list(doc_ids)), title_index)
+
+
+if __name__ == '__main__':
+    unittest.main()
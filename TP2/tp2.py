@@ -1,503 +1,850 @@
 import json
 import re
-from typing import Dict, List, Any, Set
+import ahocorasick
+from typing import Dict, List, Any, Set, Iterator, Iterable, Tuple
 import os
-import string
+import mmap
+import stat
+import sys
+import threading
+from queue import Queue
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import accumulate, chain, filterfalse, islice, repeat
+from bisect import bisect_right
+try:
+    import orjson
+except ImportError:  # stdlib json fallback, several times slower
+    orjson = None
+
+
+# Tokens of 2+ lowercase alphanumeric characters (punctuation acts as a separator)
+_TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+
+# Patterns used once or more per document, compiled once
+_PRODUCT_ID_RE = re.compile(r'/product/(\d+)')
+_MADE_IN_RE = re.compile(r'made in\s+([a-zA-Z\s]+)')
+_VARIANT_RE = re.compile(r'variant=([a-zA-Z0-9-]+)')
+_SIZE_SPLIT_RE = re.compile(r'[,|/]|and')
+_WORD_RE = re.compile(r'\S+')
+_NON_BLANK_RE = re.compile(rb'\S')
+
+_STOPWORDS = frozenset([
+    'a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
+    'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be',
+    'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
+    'will', 'would', 'shall', 'should', 'may', 'might', 'must',
+    'can', 'could', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
+    'me', 'him', 'her', 'us', 'them', 'my', 'your', 'his', 'its',
+    'our', 'their', 'mine', 'yours', 'hers', 'ours', 'theirs'
+])
+
+# Index files are written compact; set INDEX_JSON_INDENT=1 for pretty-printed output when debugging
+_JSON_INDENT = os.environ.get('INDEX_JSON_INDENT', '') not in ('', '0')
+
+if orjson is not None:
+    _JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if _JSON_INDENT else 0)
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        """Serialize obj to UTF-8 JSON bytes."""
+        return orjson.dumps(obj, option=_JSON_OPTIONS)
+else:
+    def _json_loads(data: Any) -> Any:
+        """Parse JSON from bytes, a memoryview or str."""
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+    def _json_dumps(obj: Any) -> bytes:
+        """Serialize obj to UTF-8 JSON bytes."""
+        if _JSON_INDENT:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+# Set INDEX_AGGREGATE=1 to write all indexes into one indexes.bin file plus a manifest.json
+_AGGREGATE_OUTPUT = os.environ.get('INDEX_AGGREGATE', '') not in ('', '0')
+
+# Input files below this size are memory-mapped; larger ones are read ahead by a background
+# thread while lines are parsed
+_PREFETCH_MIN_BYTES = 64 * 1024 * 1024
+_PREFETCH_DEPTH = 8
+
+# Bound methods used by clean_text, resolved once instead of per call
+_find_tokens = _TOKEN_RE.findall
+_is_stopword = _STOPWORDS.__contains__
+
+_ORIGIN_KEYWORDS = ['origin', 'made in', 'country', 'manufactured', 'produced']
+
+# Feature keys (lowercased) naming an origin, sizes or colors; 'size' also covers 'sizes', etc.
+_ORIGIN_KEY_RE = re.compile('|'.join(map(re.escape, _ORIGIN_KEYWORDS)))
+_SIZE_KEY_RE = re.compile('size')
+_COLOR_KEY_RE = re.compile('color|flavor')
+
+# Common colors to look for
+_COMMON_COLORS = ['red', 'blue', 'green', 'yellow', 'black', 'white',
+                  'orange', 'purple', 'pink', 'brown', 'gray', 'grey',
+                  'beige', 'silver', 'gold', 'navy', 'teal', 'maroon']
+
+# Category keywords mapping
+_CATEGORY_KEYWORDS = {
+    'food': ['chocolate', 'candy', 'potion', 'drink', 'beverage', 'cola', 'berry', 'flavor'],
+    'footwear': ['sneakers', 'shoes', 'boots', 'sandals', 'heel', 'footbed', 'sole'],
+    'clothing': ['beanie', 'hat', 'dress', 'shirt', 'pants', 'wardrobe', 'outfit'],
+    'electronics': ['led', 'light', 'battery', 'electronic', 'digital'],
+    'accessories': ['accessory', 'bag', 'wallet', 'belt', 'watch'],
+    'sports': ['hiking', 'outdoor', 'running', 'sport', 'active', 'performance'],
+    'beauty': ['cream', 'perfume', 'cosmetic', 'beauty', 'skin'],
+    'home': ['furniture', 'decor', 'kitchen', 'home', 'garden']
+}
+
+# Keywords indicating price ranges
+_PRICE_KEYWORDS = {
+    'budget': ['affordable', 'cheap', 'inexpensive', 'budget', 'value', 'economical'],
+    'premium': ['expensive', 'luxury', 'premium', 'high-end', 'exclusive', 'pricey']
+}
+
+# Common special features to look for
+_SPECIAL_FEATURES = [
+    'waterproof', 'led', 'light-up', 'adjustable', 'cushioned',
+    'breathable', 'durable', 'premium', 'genuine', 'sustainable',
+    'eco-friendly', 'recyclable', 'washable', 'foldable', 'portable'
+]
+
+
+def _build_keyword_automaton() -> ahocorasick.Automaton:
+    """Build one Aho-Corasick automaton over all color, category, price and feature keywords."""
+    # A keyword may belong to several kinds (e.g. 'led', 'premium'): payloads are tuples of (kind, key)
+    payloads = {}
+    for color in _COMMON_COLORS:
+        payloads.setdefault(color, []).append(('color', color))
+    for category, keywords in _CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            payloads.setdefault(keyword, []).append(('category', category))
+    for price_range, keywords in _PRICE_KEYWORDS.items():
+        for keyword in keywords:
+            payloads.setdefault(keyword, []).append(('price', price_range))
+    for feature in _SPECIAL_FEATURES:
+        payloads.setdefault(feature, []).append(('feature', feature))
+
+    automaton = ahocorasick.Automaton()
+    for keyword, hits in payloads.items():
+        automaton.add_word(keyword, tuple(hits))
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+_iter_keywords = _KEYWORD_AUTOMATON.iter
+
+
+def _scan_keywords(text: str) -> Set[Tuple[str, str]]:
+    """Return the (kind, key) pairs of every keyword occurring in text, in one pass."""
+    found = set()
+    add_hits = found.update
+    for _, hits in _iter_keywords(text):
+        add_hits(hits)
+    return found
 
 
 class IndexBuilder:
+    # Slots of the brand, positional and reviews indexes in build_all_indexes() results
+    _BRAND_SLOT = 0
+    _POSITION_SLOTS = (2, 3)
+    _REVIEWS_SLOT = 4
+    # Extra working slot (after the 11 indexes) for title-token brand candidates
+    _BRAND_CANDIDATES_SLOT = 11
+
+    # Shared, immutable stopword set (clean_text filters through the module-level bound lookup)
+    stopwords = _STOPWORDS
+
     def __init__(self):
-        self.stopwords = set([
-            'a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
-            'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be',
-            'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did',
-            'will', 'would', 'shall', 'should', 'may', 'might', 'must',
-            'can', 'could', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
-            'me', 'him', 'her', 'us', 'them', 'my', 'your', 'his', 'its',
-            'our', 'their', 'mine', 'yours', 'hers', 'ours', 'theirs'
-        ])
+        self.document_count = 0
+        self.document_urls = set()
 
     def clean_text(self, text: str) -> List[str]:
         """Clean and tokenize text, removing stopwords and punctuation."""
         if not text:
             return []
 
-        # Remove punctuation and convert to lowercase
-        text = text.lower()
-        text = text.translate(str.maketrans('', '', string.punctuation))
-
-        # Tokenize by spaces
-        tokens = text.split()
-
-        # Remove stopwords
-        tokens = [token for token in tokens if token not in self.stopwords]
+        # Single regex scan over the lowercased text, then drop stopwords in C via filterfalse
+        return list(filterfalse(_is_stopword, _find_tokens(text.lower())))
+
+    @staticmethod
+    def _parse_document(line: Any) -> Dict[str, Any]:
+        """Parse one JSONL line, interning its URL so all posting lists share one string."""
+        doc = _json_loads(line)
+        url = doc.get('url')
+        if isinstance(url, str):
+            doc['url'] = sys.intern(url)
+        return doc
+
+    @staticmethod
+    def _read_chunks(filepath: str, chunk_size: int) -> Iterator[bytes]:
+        """Yield the file in fixed-size binary chunks, read ahead by a background thread."""
+        with open(filepath, 'rb') as f:
+            # Ask the kernel for aggressive read-ahead on cold-cache sequential scans
+            # (POSIX regular files only: pipes reject the hint)
+            if hasattr(os, 'posix_fadvise') and stat.S_ISREG(os.fstat(f.fileno()).st_mode):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+            # f.read releases the GIL, so disk reads overlap with parsing; the bounded queue caps memory
+            chunks = Queue(maxsize=_PREFETCH_DEPTH)
+            stop = threading.Event()
+
+            def read_ahead():
+                try:
+                    for chunk in iter(lambda: f.read(chunk_size), b''):
+                        chunks.put(chunk)
+                        if stop.is_set():
+                            break
+                except BaseException as error:
+                    # Hand read errors to the consumer rather than dying without the end sentinel
+                    chunks.put(error)
+                    return
+                chunks.put(b'')
+
+            reader = threading.Thread(target=read_ahead, daemon=True)
+            reader.start()
+            try:
+                for chunk in iter(chunks.get, b''):
+                    if isinstance(chunk, BaseException):
+                        raise chunk
+                    yield chunk
+            finally:
+                # Unblock the reader if the consumer stopped early, then wait for it before closing f
+                stop.set()
+                while reader.is_alive():
+                    while not chunks.empty():
+                        chunks.get_nowait()
+                    reader.join(0.01)
+
+    def _iter_jsonl_mmap(self, filepath: str) -> Iterator[Dict[str, Any]]:
+        """Yield documents from a memory-mapped JSONL file, parsing line slices without copying them."""
+        with open(filepath, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            find = mm.find
+            non_blank = _NON_BLANK_RE.search
+            end = len(mm)
+            pos = 0
+            while pos < end:
+                newline = find(b'\n', pos)
+                if newline < 0:
+                    newline = end
+                if non_blank(mm, pos, newline):
+                    line = view[pos:newline]
+                    try:
+                        doc = self._parse_document(line)
+                    finally:
+                        # A parse error's traceback keeps line alive: release it so the map can close
+                        line.release()
+                    yield doc
+                pos = newline + 1
+
+    def iter_jsonl(self, filepath: str, chunk_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+        """Lazily yield documents from a JSONL file.
+
+        Regular files below _PREFETCH_MIN_BYTES are memory-mapped (mmap cannot map empty files);
+        larger ones and pipes or devices are read in fixed-size binary chunks by a read-ahead thread.
+        """
+        file_stat = os.stat(filepath)
+        if stat.S_ISREG(file_stat.st_mode) and file_stat.st_size < _PREFETCH_MIN_BYTES:
+            if file_stat.st_size:
+                yield from self._iter_jsonl_mmap(filepath)
+            return
+
+        tail = b''
+        for chunk in self._read_chunks(filepath, chunk_size):
+            # Only complete lines are parsed; the trailing partial line waits for the next chunk
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield self._parse_document(line)
 
-        return tokens
+        if tail.strip():
+            yield self._parse_document(tail)
 
     def parse_jsonl(self, filepath: str) -> List[Dict[str, Any]]:
         """Parse JSONL file and return list of documents."""
-        documents = []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    documents.append(json.loads(line))
-        return documents
+        return list(self.iter_jsonl(filepath))
+
+    def preprocess_document(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute the lowercased text and tokens of one document, shared by all index builders."""
+        title = doc.get('title', '')
+        description = doc.get('description', '')
+        title_lower = title.lower()
+        desc_lower = description.lower()
+
+        # Feature keys are lowercased once; values are kept as-is (size parsing) and lowercased
+        features = [(key.lower(), str(value)) for key, value in doc.get('product_features', {}).items()]
+
+        return {
+            'title_lower': title_lower,
+            'title_tokens': self.clean_text(title),
+            'title_keywords': _scan_keywords(title_lower),
+            'desc_lower': desc_lower,
+            'desc_tokens': self.clean_text(description),
+            'desc_keywords': _scan_keywords(desc_lower),
+            'features': features,
+            'features_lower': [(key, value.lower()) for key, value in features]
+        }
+
+    def preprocess(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Compute per-document lowercased text and tokens once, shared by all index builders."""
+        return [self.preprocess_document(doc) for doc in documents]
 
     def extract_product_id_from_url(self, url: str) -> str:
         """Extract product ID from URL."""
         # Extract the number after /product/
-        match = re.search(r'/product/(\d+)', url)
+        match = _PRODUCT_ID_RE.search(url)
         if match:
             return match.group(1)
         return ""
 
-    # ==================== INDEXES PRINCIPAUX ====================
+    @staticmethod
+    def _sorted_postings(index: Dict[str, Set[str]]) -> Dict[str, List[str]]:
+        """Turn posting sets built during indexing into sorted URL lists."""
+        return {key: sorted(urls) for key, urls in index.items()}
 
-    def create_brand_index(self, documents: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-        """Create brand index from product features."""
-        brand_index = {}
+    def _build_index(self, index_document, documents: Iterable[Dict[str, Any]],
+                     preprocessed: Iterable[Dict[str, Any]] = None, index: Dict = None) -> Dict:
+        """Run a single per-document indexing step over all documents."""
+        if index is None:
+            index = {}
 
-        for doc in documents:
-            url = doc.get('url', '')
-            features = doc.get('product_features', {})
-
-            # Look for brand in features
-            brand = None
-
-            # Check for brand field (case-insensitive)
-            for key, value in features.items():
-                if 'brand' in key.lower():
-                    brand = str(value).strip()
-                    break
-
-            # If no brand found in features, try to extract from title or description
-            if not brand:
-                title = doc.get('title', '')
-                # Simple heuristic: look for brand-like words in title
-                title_tokens = self.clean_text(title)
-                if title_tokens:
-                    # Assume first token might be brand (for this dataset)
-                    brand = title_tokens[0].title() if title_tokens else ""
-
-            if brand:
-                # Normalize brand name
-                brand = brand.lower().strip()
-                if brand not in brand_index:
-                    brand_index[brand] = []
-
-                # Add URL to brand index
-                if url not in brand_index[brand]:
-                    brand_index[brand].append(url)
-
-        # Sort URLs for each brand
-        for brand in brand_index:
-            brand_index[brand].sort()
+        # Preprocess lazily, one document at a time, so documents may be a one-shot iterator
+        if preprocessed is None:
+            pairs = ((doc, self.preprocess_document(doc)) for doc in documents)
+        else:
+            pairs = zip(documents, preprocessed)
 
-        return brand_index
+        for doc, pre in pairs:
+            index_document(index, doc.get('url', ''), doc, pre)
 
-    def create_origin_index(self, documents: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-        """Create origin index from product features (looking for 'made in' or similar)."""
-        origin_index = {}
+        return index
 
-        for doc in documents:
-            url = doc.get('url', '')
-            features = doc.get('product_features', {})
-
-            # Look for origin/made in information
-            origin = None
-
-            # Check for origin-related fields (case-insensitive)
-            for key, value in features.items():
-                key_lower = key.lower()
-                if any(origin_keyword in key_lower for origin_keyword in
-                       ['origin', 'made in', 'country', 'manufactured', 'produced']):
-                    origin = str(value).strip()
-                    break
-
-            # If no origin found in features, check description
-            if not origin:
-                description = doc.get('description', '').lower()
-                # Simple pattern matching for "made in [country]"
-                made_in_match = re.search(r'made in\s+([a-zA-Z\s]+)', description)
-                if made_in_match:
-                    origin = made_in_match.group(1).strip()
-
-            if origin:
-                # Normalize origin name
-                origin = origin.lower().strip()
-                if origin not in origin_index:
-                    origin_index[origin] = []
-
-                # Add URL to origin index
-                if url not in origin_index[origin]:
-                    origin_index[origin].append(url)
-
-        # Sort URLs for each origin
-        for origin in origin_index:
-            origin_index[origin].sort()
-
-        return origin_index
-
-    def create_title_position_index(self, documents: List[Dict[str, Any]]) -> Dict[str, Dict[str, List[int]]]:
-        """Create title index with positions."""
-        title_index = {}
+    def _build_postings(self, index_document, documents: List[Dict[str, Any]],
+                        preprocessed: List[Dict[str, Any]] = None,
+                        index: Dict[str, Set[str]] = None) -> Dict[str, List[str]]:
+        """Run a posting-list indexing step over all documents, then sort each posting list once."""
+        if index is None:
+            index = defaultdict(set)
+        return self._sorted_postings(self._build_index(index_document, documents, preprocessed, index))
 
-        for doc in documents:
-            url = doc.get('url', '')
-            title = doc.get('title', '')
+    # ==================== INDEXES PRINCIPAUX ====================
 
-            tokens = self.clean_text(title)
+    def _index_brand(self, brand_index: Dict[str, Set[str]], url: str,
+                     doc: Dict[str, Any], pre: Dict[str, Any], *, brand_candidates: Dict[str, Set[str]]):
+        """Add one document to the brand index, or its title-token brand to brand_candidates."""
+        # Look for brand in features
+        brand = None
+
+        # Check for brand field (case-insensitive)
+        for key, value in pre['features_lower']:
+            if 'brand' in key:
+                brand = value.strip()
+                break
+
+        if brand:
+            # Normalize brand name
+            brand_index[brand.lower().strip()].add(url)
+        else:
+            # If no brand found in features, the first title token is only a candidate,
+            # kept apart until the known feature brands are resolved
+            title_tokens = pre['title_tokens']
+            if title_tokens:
+                brand_candidates[title_tokens[0]].add(url)
+
+    @staticmethod
+    def _resolve_brand_candidates(brand_index: Dict[str, Set[str]],
+                                  brand_candidates: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+        """Merge title-token brand candidates into brand_index when some product's features name that brand."""
+        for brand, urls in brand_candidates.items():
+            if brand in brand_index:
+                brand_index[brand] |= urls
+        return brand_index
 
-            for position, token in enumerate(tokens):
-                if token not in title_index:
-                    title_index[token] = {}
+    def create_brand_index(self, documents: List[Dict[str, Any]],
+                           preprocessed: List[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+        """Create brand index from product features."""
+        brand_candidates = defaultdict(set)
+        brand_index = self._build_index(partial(self._index_brand, brand_candidates=brand_candidates),
+                                        documents, preprocessed, index=defaultdict(set))
+        return self._sorted_postings(self._resolve_brand_candidates(brand_index, brand_candidates))
+
+    def _index_origin(self, origin_index: Dict[str, Set[str]], url: str,
+                      doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the origin index."""
+        # Look for origin/made in information
+        origin = None
+
+        # Check for origin-related fields (case-insensitive)
+        for key_lower, value in pre['features_lower']:
+            if _ORIGIN_KEY_RE.search(key_lower):
+                origin = value.strip()
+                break
+
+        # If no origin found in features, check description
+        if not origin:
+            # Simple pattern matching for "made in [country]"
+            made_in_match = _MADE_IN_RE.search(pre['desc_lower'])
+            if made_in_match:
+                origin = made_in_match.group(1).strip()
+
+        if origin:
+            # Normalize origin name
+            origin_index[origin.lower().strip()].add(url)
+
+    def create_origin_index(self, documents: List[Dict[str, Any]],
+                            preprocessed: List[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+        """Create origin index from product features (looking for 'made in' or similar)."""
+        return self._build_postings(self._index_origin, documents, preprocessed)
+
+    @staticmethod
+    def _new_position_index() -> Dict[str, Dict[str, List[int]]]:
+        """Empty positional index creating its token and URL entries on first access."""
+        # Positions are packed in unsigned int arrays rather than lists of int objects;
+        # partial instead of a lambda keeps the index picklable
+        return defaultdict(partial(defaultdict, partial(array, 'I')))
+
+    @staticmethod
+    def _plain_positions(position_index: Dict[str, Dict[str, List[int]]]) -> Dict[str, Dict[str, List[int]]]:
+        """Convert a positional index built with defaultdicts and arrays back to plain dicts and lists."""
+        return {
+            token: {url: positions.tolist() for url, positions in postings.items()}
+            for token, postings in position_index.items()
+        }
 
-                if url not in title_index[token]:
-                    title_index[token][url] = []
+    @staticmethod
+    def _index_positions(position_index: Dict[str, Dict[str, List[int]]], url: str, tokens: List[str]):
+        """Add the position of every token of one document to a positional index."""
+        for position, token in enumerate(tokens):
+            position_index[token][url].append(position)
 
-                title_index[token][url].append(position)
+    def _index_title(self, title_index: Dict[str, Dict[str, List[int]]], url: str,
+                     doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the title position index."""
+        self._index_positions(title_index, url, pre['title_tokens'])
 
-        return title_index
+    def create_title_position_index(self, documents: List[Dict[str, Any]],
+                                    preprocessed: List[Dict[str, Any]] = None) -> Dict[str, Dict[str, List[int]]]:
+        """Create title index with positions."""
+        return self._plain_positions(self._build_index(self._index_title, documents, preprocessed,
+                                                       index=self._new_position_index()))
 
-    def create_description_position_index(self, documents: List[Dict[str, Any]]) -> Dict[str, Dict[str, List[int]]]:
-        """Create description index with positions."""
-        description_index = {}
+    def _index_description(self, description_index: Dict[str, Dict[str, List[int]]], url: str,
+                           doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the description position index."""
+        self._index_positions(description_index, url, pre['desc_tokens'])
 
-        for doc in documents:
-            url = doc.get('url', '')
-            description = doc.get('description', '')
+    def create_description_position_index(self, documents: List[Dict[str, Any]],
+                                          preprocessed: List[Dict[str, Any]] = None) -> Dict[str, Dict[str, List[int]]]:
+        """Create description index with positions."""
+        return self._plain_positions(self._build_index(self._index_description, documents, preprocessed,
+                                                       index=self._new_position_index()))
 
-            tokens = self.clean_text(description)
+    def _index_reviews(self, reviews_index: Dict[str, Dict[str, Any]], url: str,
+                       doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add the review statistics of one document to the reviews index."""
+        reviews = doc.get('product_reviews', [])
 
-            for position, token in enumerate(tokens):
-                if token not in description_index:
-                    description_index[token] = {}
+        if reviews:
+            total_reviews = len(reviews)
 
-                if url not in description_index[token]:
-                    description_index[token][url] = []
+            # Calculate average rating
+            total_rating = sum(review.get('rating', 0) for review in reviews)
+            avg_rating = total_rating / total_reviews
 
-                description_index[token][url].append(position)
+            # Get latest review by date (max keeps the first one on ties, like a stable sort)
+            latest_review = max(reviews, key=lambda x: x.get('date', '')).get('rating', 0)
 
-        return description_index
+            reviews_index[url] = {
+                'total_reviews': total_reviews,
+                'average_rating': round(avg_rating, 2),
+                'latest_rating': latest_review
+            }
 
-    def create_reviews_index(self, documents: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    def create_reviews_index(self, documents: List[Dict[str, Any]],
+                             preprocessed: List[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
         """Create reviews index with summary statistics."""
-        reviews_index = {}
-
-        for doc in documents:
-            url = doc.get('url', '')
-            reviews = doc.get('product_reviews', [])
-
-            if reviews:
-                total_reviews = len(reviews)
-
-                # Calculate average rating
-                total_rating = sum(review.get('rating', 0) for review in reviews)
-                avg_rating = total_rating / total_reviews if total_reviews > 0 else 0
-
-                # Get latest review (assuming reviews are sorted by date)
-                latest_review = None
-                if reviews:
-                    # Sort by date if available
-                    sorted_reviews = sorted(
-                        reviews,
-                        key=lambda x: x.get('date', ''),
-                        reverse=True
-                    )
-                    latest_review = sorted_reviews[0].get('rating', 0)
-
-                reviews_index[url] = {
-                    'total_reviews': total_reviews,
-                    'average_rating': round(avg_rating, 2),
-                    'latest_rating': latest_review
-                }
-
-        return reviews_index
+        # Reviews only use the raw documents: skip preprocessing when not provided
+        if preprocessed is None:
+            preprocessed = repeat(None)
+        return self._build_index(self._index_reviews, documents, preprocessed)
 
     # ==================== FEATURES SUPPLÉMENTAIRES ====================
 
-    def create_material_index(self, documents: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-        """Create material index from product features."""
-        material_index = {}
-
-        for doc in documents:
-            url = doc.get('url', '')
-            features = doc.get('product_features', {})
-
-            # Look for material in features
-            material = None
+    def _index_material(self, material_index: Dict[str, Set[str]], url: str,
+                        doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the material index."""
+        # Look for material in features
+        material = None
 
-            # Check for material field (case-insensitive)
-            for key, value in features.items():
-                if 'material' in key.lower():
-                    material = str(value).strip()
-                    break
+        # Check for material field (case-insensitive)
+        for key, value in pre['features_lower']:
+            if 'material' in key:
+                material = value.strip()
+                break
 
-            if material:
-                # Normalize material name
-                material = material.lower().strip()
-                if material not in material_index:
-                    material_index[material] = []
+        if material:
+            # Normalize material name
+            material_index[material.lower().strip()].add(url)
 
-                # Add URL to material index
-                if url not in material_index[material]:
-                    material_index[material].append(url)
-
-        # Sort URLs for each material
-        for material in material_index:
-            material_index[material].sort()
-
-        return material_index
-
-    def create_size_index(self, documents: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    def create_material_index(self, documents: List[Dict[str, Any]],
+                              preprocessed: List[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+        """Create material index from product features."""
+        return self._build_postings(self._index_material, documents, preprocessed)
+
+    def _index_size(self, size_index: Dict[str, Set[str]], url: str,
+                    doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the size index."""
+        # Look for sizes in features
+        sizes = []
+
+        # Check for size fields (case-insensitive)
+        for key, value in pre['features']:
+            if _SIZE_KEY_RE.search(key):
+                size_text = value.strip()
+                # Parse sizes (could be "small, medium, large" or "6,7,8,9")
+                size_parts = _SIZE_SPLIT_RE.split(size_text)
+                for part in size_parts:
+                    clean_size = part.strip().lower()
+                    if clean_size:
+                        sizes.append(clean_size)
+                break
+
+        # Also check variant in URL for size information
+        if 'variant=' in url:
+            variant_match = _VARIANT_RE.search(url)
+            if variant_match:
+                variant = variant_match.group(1)
+                # Check if variant contains size information
+                for size_keyword in ['small', 'medium', 'large', 'xs', 's', 'm', 'l', 'xl']:
+                    if size_keyword in variant.lower():
+                        sizes.append(size_keyword)
+
+        # Add to size index
+        for size in sizes:
+            size_index[size].add(url)
+
+    def create_size_index(self, documents: List[Dict[str, Any]],
+                          preprocessed: List[Dict[str, Any]] = None) -> Dict[str, List[str]]:
         """Create size index from product features."""
-        size_index = {}
-
-        for doc in documents:
-            url = doc.get('url', '')
-            features = doc.get('product_features', {})
-
-            # Look for sizes in features
-            sizes = []
-
-            # Check for size fields (case-insensitive)
-            for key, value in features.items():
-                if any(size_keyword in key.lower() for size_keyword in ['size', 'sizes']):
-                    size_text = str(value).strip()
-                    # Parse sizes (could be "small, medium, large" or "6,7,8,9")
-                    size_parts = re.split(r'[,|/]|and', size_text)
-                    for part in size_parts:
-                        clean_size = part.strip().lower()
-                        if clean_size:
-                            sizes.append(clean_size)
-                    break
-
-            # Also check variant in URL for size information
-            if 'variant=' in url:
-                variant_match = re.search(r'variant=([a-zA-Z0-9-]+)', url)
-                if variant_match:
-                    variant = variant_match.group(1)
-                    # Check if variant contains size information
-                    for size_keyword in ['small', 'medium', 'large', 'xs', 's', 'm', 'l', 'xl']:
-                        if size_keyword in variant.lower():
-                            sizes.append(size_keyword)
-
-            # Add to size index
-            for size in sizes:
-                if size not in size_index:
-                    size_index[size] = []
-                if url not in size_index[size]:
-                    size_index[size].append(url)
-
-        # Sort URLs for each size
-        for size in size_index:
-            size_index[size].sort()
-
-        return size_index
-
-    def create_color_index(self, documents: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        return self._build_postings(self._index_size, documents, preprocessed)
+
+    def _index_color(self, color_index: Dict[str, Set[str]], url: str,
+                     doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the color index."""
+        # Look for colors in features
+        colors = []
+
+        # Check for color fields (case-insensitive)
+        for key, value in pre['features_lower']:
+            if _COLOR_KEY_RE.search(key):
+                color_text = value.strip()
+                # Parse colors from text
+                keywords = _scan_keywords(color_text)
+                colors.extend(color for color in _COMMON_COLORS if ('color', color) in keywords)
+
+        # Also check variant in URL for color information
+        if 'variant=' in url:
+            variant_match = _VARIANT_RE.search(url)
+            if variant_match:
+                variant = variant_match.group(1)
+                keywords = _scan_keywords(variant.lower())
+                colors.extend(color for color in _COMMON_COLORS if ('color', color) in keywords)
+
+        # Add to color index
+        for color in colors:
+            color_index[color].add(url)
+
+    def create_color_index(self, documents: List[Dict[str, Any]],
+                           preprocessed: List[Dict[str, Any]] = None) -> Dict[str, List[str]]:
         """Create color index from product features."""
-        color_index = {}
+        return self._build_postings(self._index_color, documents, preprocessed)
 
-        # Common colors to look for
-        common_colors = ['red', 'blue', 'green', 'yellow', 'black', 'white',
-                         'orange', 'purple', 'pink', 'brown', 'gray', 'grey',
-                         'beige', 'silver', 'gold', 'navy', 'teal', 'maroon']
+    def _index_category(self, category_index: Dict[str, Set[str]], url: str,
+                        doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the category index."""
+        keywords = pre['title_keywords'] | pre['desc_keywords']
 
-        for doc in documents:
-            url = doc.get('url', '')
-            features = doc.get('product_features', {})
-
-            # Look for colors in features
-            colors = []
-
-            # Check for color fields (case-insensitive)
-            for key, value in features.items():
-                if any(color_keyword in key.lower() for color_keyword in
-                       ['color', 'colors', 'flavor', 'flavors']):
-                    color_text = str(value).strip().lower()
-                    # Parse colors from text
-                    for color in common_colors:
-                        if color in color_text:
-                            colors.append(color)
-
-            # Also check variant in URL for color information
-            if 'variant=' in url:
-                variant_match = re.search(r'variant=([a-zA-Z0-9-]+)', url)
-                if variant_match:
-                    variant = variant_match.group(1)
-                    for color in common_colors:
-                        if color in variant.lower():
-                            colors.append(color)
-
-            # Add to color index
-            for color in colors:
-                if color not in color_index:
-                    color_index[color] = []
-                if url not in color_index[color]:
-                    color_index[color].append(url)
-
-        # Sort URLs for each color
-        for color in color_index:
-            color_index[color].sort()
-
-        return color_index
-
-    def create_category_index(self, documents: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-        """Create category index by analyzing product content."""
-        category_index = {}
-
-        # Category keywords mapping
-        category_keywords = {
-            'food': ['chocolate', 'candy', 'potion', 'drink', 'beverage', 'cola', 'berry', 'flavor'],
-            'footwear': ['sneakers', 'shoes', 'boots', 'sandals', 'heel', 'footbed', 'sole'],
-            'clothing': ['beanie', 'hat', 'dress', 'shirt', 'pants', 'wardrobe', 'outfit'],
-            'electronics': ['led', 'light', 'battery', 'electronic', 'digital'],
-            'accessories': ['accessory', 'bag', 'wallet', 'belt', 'watch'],
-            'sports': ['hiking', 'outdoor', 'running', 'sport', 'active', 'performance'],
-            'beauty': ['cream', 'perfume', 'cosmetic', 'beauty', 'skin'],
-            'home': ['furniture', 'decor', 'kitchen', 'home', 'garden']
-        }
+        # Determine category based on keywords
+        categories_found = [category for category in _CATEGORY_KEYWORDS
+                            if ('category', category) in keywords]
 
-        for doc in documents:
-            url = doc.get('url', '')
-            title = doc.get('title', '').lower()
-            description = doc.get('description', '').lower()
-
-            # Determine category based on keywords
-            categories_found = []
-            for category, keywords in category_keywords.items():
-                for keyword in keywords:
-                    if keyword in title or keyword in description:
-                        categories_found.append(category)
-                        break
-
-            # If no category found, use default
-            if not categories_found:
-                categories_found = ['other']
-
-            # Add to category index
-            for category in categories_found:
-                if category not in category_index:
-                    category_index[category] = []
-                if url not in category_index[category]:
-                    category_index[category].append(url)
-
-        # Sort URLs for each category
-        for category in category_index:
-            category_index[category].sort()
-
-        return category_index
-
-    def create_price_range_index(self, documents: List[Dict[str, Any]]) -> Dict[str, List[str]]:
-        """Create price range index by analyzing reviews and descriptions."""
-        price_index = {
-            'budget': [],
-            'midrange': [],
-            'premium': []
-        }
+        # If no category found, use default
+        if not categories_found:
+            categories_found = ['other']
 
-        # Keywords indicating price ranges
-        price_keywords = {
-            'budget': ['affordable', 'cheap', 'inexpensive', 'budget', 'value', 'economical'],
-            'premium': ['expensive', 'luxury', 'premium', 'high-end', 'exclusive', 'pricey']
-        }
-
-        for doc in documents:
-            url = doc.get('url', '')
-            description = doc.get('description', '').lower()
-            reviews = doc.get('product_reviews', [])
+        # Add to category index
+        for category in categories_found:
+            category_index[category].add(url)
 
-            # Collect all text to analyze
-            all_text = description
-
-            # Add review text
-            for review in reviews:
-                all_text += " " + review.get('text', '').lower()
-
-            # Determine price range based on keywords
+    def create_category_index(self, documents: List[Dict[str, Any]],
+                              preprocessed: List[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+        """Create category index by analyzing product content."""
+        return self._build_postings(self._index_category, documents, preprocessed)
+
+    def _index_price_range(self, price_index: Dict[str, Set[str]], url: str,
+                           doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the price range index."""
+        reviews = doc.get('product_reviews', [])
+
+        # Collect review text to analyze in one join (the description is already scanned)
+        review_text = " ".join([review.get('text', '') for review in reviews]).lower()
+        keywords = pre['desc_keywords'] | _scan_keywords(review_text)
+
+        # Determine price range based on keywords (budget wins over premium)
+        if ('price', 'budget') in keywords:
+            price_range = 'budget'
+        elif ('price', 'premium') in keywords:
+            price_range = 'premium'
+        else:
             price_range = 'midrange'  # default
 
-            # Check for budget keywords
-            for keyword in price_keywords['budget']:
-                if keyword in all_text:
-                    price_range = 'budget'
-                    break
+        # Add to price index
+        price_index[price_range].add(url)
 
-            # Check for premium keywords (only if not already budget)
-            if price_range == 'midrange':
-                for keyword in price_keywords['premium']:
-                    if keyword in all_text:
-                        price_range = 'premium'
-                        break
+    @staticmethod
+    def _new_price_index() -> Dict[str, Set[str]]:
+        """Price index with its three ranges always present."""
+        return defaultdict(set, {
+            'budget': set(),
+            'midrange': set(),
+            'premium': set()
+        })
 
-            # Add to price index
-            if url not in price_index[price_range]:
-                price_index[price_range].append(url)
-
-        # Sort URLs for each price range
-        for price_range in price_index:
-            price_index[price_range].sort()
+    def create_price_range_index(self, documents: List[Dict[str, Any]],
+                                 preprocessed: List[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+        """Create price range index by analyzing reviews and descriptions."""
+        return self._build_postings(self._index_price_range, documents, preprocessed,
+                                    index=self._new_price_index())
+
+    def _index_features(self, features_index: Dict[str, Set[str]], url: str,
+                        doc: Dict[str, Any], pre: Dict[str, Any]):
+        """Add one document to the special features index."""
+        # Collect all features text in one join
+        features_text = " ".join([value for key, value in pre['features_lower']])
+        keywords = _scan_keywords(features_text) | pre['desc_keywords']
+        all_features_text = features_text + " " + pre['desc_lower']
+
+        # Look for special features
+        find = all_features_text.find
+        words = word_starts = None
+        for feature in _SPECIAL_FEATURES:
+            if ('feature', feature) in keywords:
+                if words is None:
+                    # Split the text once per document, remembering where each word starts
+                    word_matches = list(_WORD_RE.finditer(all_features_text))
+                    words = [match.group() for match in word_matches]
+                    word_starts = [match.start() for match in word_matches]
+
+                # The first word containing the feature is the one holding its first occurrence
+                i = bisect_right(word_starts, find(feature)) - 1
+
+                # Get context around the feature word, unless it is the last word
+                if i < len(words) - 1:
+                    feature_phrase = " ".join(words[max(0, i - 1):i + 2])
+                else:
+                    feature_phrase = feature
 
-        return price_index
+                features_index[feature_phrase].add(url)
 
-    def create_features_index(self, documents: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    def create_features_index(self, documents: List[Dict[str, Any]],
+                              preprocessed: List[Dict[str, Any]] = None) -> Dict[str, List[str]]:
         """Create special features index from product features."""
-        features_index = {}
-
-        # Common special features to look for
-        special_features_keywords = [
-            'waterproof', 'led', 'light-up', 'adjustable', 'cushioned',
-            'breathable', 'durable', 'premium', 'genuine', 'sustainable',
-            'eco-friendly', 'recyclable', 'washable', 'foldable', 'portable'
-        ]
-
+        return self._build_postings(self._index_features, documents, preprocessed)
+
+    # ==================== INDEXATION EN UNE PASSE ====================
+
+    def _new_indexes(self) -> Tuple[Dict, ...]:
+        """Empty working indexes, in build_all_indexes() order, then the brand candidates."""
+        return (defaultdict(set), defaultdict(set), self._new_position_index(),
+                self._new_position_index(), {}, defaultdict(set),
+                defaultdict(set), defaultdict(set), defaultdict(set), self._new_price_index(),
+                defaultdict(set), defaultdict(set))
+
+    def _index_documents(self, documents: Iterable[Dict[str, Any]]) -> Tuple[Dict, ...]:
+        """Dispatch every document to the 11 indexing steps, returning unsorted working indexes."""
+        indexes = self._new_indexes()
+        # The brand step also fills the brand candidates slot, which has no step of its own
+        index_brand = partial(self._index_brand, brand_candidates=indexes[self._BRAND_CANDIDATES_SLOT])
+        steps = (index_brand, self._index_origin, self._index_title,
+                 self._index_description, self._index_reviews, self._index_material,
+                 self._index_size, self._index_color, self._index_category,
+                 self._index_price_range, self._index_features)
+        dispatch = list(zip(steps, indexes))
+
+        # Bound once: the loop body runs for every document
+        preprocess_document = self.preprocess_document
+        add_url = self.document_urls.add
+        count = 0
         for doc in documents:
             url = doc.get('url', '')
-            features = doc.get('product_features', {})
-            description = doc.get('description', '').lower()
-
-            # Collect all features text
-            all_features_text = ""
-            for key, value in features.items():
-                all_features_text += " " + str(value).lower()
-            all_features_text += " " + description
-
-            # Look for special features
-            for feature in special_features_keywords:
-                if feature in all_features_text:
-                    # Get the full feature phrase if possible
-                    feature_phrase = feature
-                    # Try to find a more complete phrase
-                    words = all_features_text.split()
-                    for i, word in enumerate(words):
-                        if feature in word and i < len(words) - 1:
-                            # Get context around the feature word
-                            start = max(0, i - 1)
-                            end = min(len(words), i + 2)
-                            feature_phrase = " ".join(words[start:end])
-                            break
-
-                    if feature_phrase not in features_index:
-                        features_index[feature_phrase] = []
-                    if url not in features_index[feature_phrase]:
-                        features_index[feature_phrase].append(url)
-
-        # Sort URLs for each feature
-        for feature in features_index:
-            features_index[feature].sort()
-
-        return features_index
+            add_url(url)
+            pre = preprocess_document(doc)
+            for index_document, index in dispatch:
+                index_document(index, url, doc, pre)
+            count += 1
+
+        self.document_count += count
+        return indexes
+
+    def _merge_shard(self, indexes: Tuple[Dict, ...], shard: Tuple[Dict, ...], count: int, urls: Set[str]):
+        """Merge the working indexes of the next shard into indexes, keeping first-seen key order."""
+        for slot, (index, part) in enumerate(zip(indexes, shard)):
+            if slot in self._POSITION_SLOTS:
+                for token, postings in part.items():
+                    token_postings = index[token]
+                    for url, positions in postings.items():
+                        token_postings[url].extend(positions)
+            elif slot == self._REVIEWS_SLOT:
+                index.update(part)
+            else:
+                for key, key_urls in part.items():
+                    index[key] |= key_urls
+        self.document_count += count
+        self.document_urls |= urls
+
+    def _finalize_indexes(self, indexes: Tuple[Dict, ...]) -> Tuple[Dict, ...]:
+        """Resolve brand candidates, sort posting sets and turn positional defaultdicts into plain dicts."""
+        brand_candidates = indexes[self._BRAND_CANDIDATES_SLOT]
+        finalized = []
+        for slot, index in enumerate(indexes[:self._BRAND_CANDIDATES_SLOT]):
+            if slot in self._POSITION_SLOTS:
+                finalized.append(self._plain_positions(index))
+            elif slot == self._REVIEWS_SLOT:
+                finalized.append(index)
+            elif slot == self._BRAND_SLOT:
+                finalized.append(self._sorted_postings(self._resolve_brand_candidates(index, brand_candidates)))
+            else:
+                finalized.append(self._sorted_postings(index))
+        return tuple(finalized)
+
+    def build_all_indexes(self, documents: Iterable[Dict[str, Any]], workers: int = 1,
+                          shard_size: int = 5000) -> Tuple[Dict, ...]:
+        """Build the 11 indexes in a single pass over the documents.
+
+        Each document is preprocessed once and dispatched to every index, so
+        documents can come from a lazy iterator such as iter_jsonl().
+        With workers > 1 and more than one shard of documents, shards are
+        indexed in worker processes and merged back in input order.
+        Returns (brand, origin, title, description, reviews, material, size,
+        color, category, price, features) indexes.
+        """
+        self.document_count = 0
+        self.document_urls = set()
+        if workers <= 1:
+            return self._finalize_indexes(self._index_documents(documents))
+
+        documents = iter(documents)
+        shards = iter(lambda: list(islice(documents, shard_size)), [])
+        first_shard = next(shards, [])
+        second_shard = next(shards, None)
+        if second_shard is None:
+            # Small input: starting worker processes would cost more than it saves
+            return self._finalize_indexes(self._index_documents(first_shard))
+
+        indexes = self._new_indexes()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for shard in chain((first_shard, second_shard), shards):
+                pending.append(executor.submit(_index_shard, shard))
+                # Bound the shards in flight so the input is still streamed
+                if len(pending) >= 2 * workers:
+                    self._merge_shard(indexes, *pending.popleft().result())
+            while pending:
+                self._merge_shard(indexes, *pending.popleft().result())
+
+        return self._finalize_indexes(indexes)
+
+    # ==================== IDENTIFIANTS DE DOCUMENTS ====================
+
+    @staticmethod
+    def assign_doc_ids(urls: Iterable[str]) -> Dict[str, int]:
+        """Number documents by sorted URL (duplicates share one id).
+
+        Pass the document_urls of the last build_all_indexes() call, or the
+        URLs of the indexes to encode, e.g. chain.from_iterable(index.values()).
+        """
+        return {url: doc_id for doc_id, url in enumerate(sorted(set(urls)))}
+
+    @staticmethod
+    def encode_position_index(position_index: Dict[str, Dict[str, List[int]]],
+                              doc_ids: Dict[str, int]) -> Dict[str, Dict[int, List[int]]]:
+        """Replace URLs by doc ids and store each position list as gaps from the previous position."""
+        encoded = {}
+        for token, postings in position_index.items():
+            encoded_postings = {}
+            for doc_id, positions in sorted((doc_ids[url], positions) for url, positions in postings.items()):
+                previous = 0
+                gaps = []
+                for position in positions:
+                    gaps.append(position - previous)
+                    previous = position
+                encoded_postings[doc_id] = gaps
+            encoded[token] = encoded_postings
+        return encoded
+
+    @staticmethod
+    def decode_position_index(encoded: Dict[str, Dict[Any, List[int]]],
+                              urls: List[str]) -> Dict[str, Dict[str, List[int]]]:
+        """Rebuild a {token: {url: positions}} index from its doc-id and gap encoding."""
+        return {
+            token: {urls[int(doc_id)]: list(accumulate(gaps)) for doc_id, gaps in postings.items()}
+            for token, postings in encoded.items()
+        }
 
     def save_index_to_json(self, index: Dict, filename: str):
         """Save index to JSON file."""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(index, f, indent=2, ensure_ascii=False)
+        with open(filename, 'wb') as f:
+            f.write(_json_dumps(index))
+
+    def save_indexes_to_json(self, named_indexes: List[Tuple[str, Any]], output_dir: str):
+        """Save each (name, index) pair to output_dir/name.json, overlapping the file writes in threads."""
+        with ThreadPoolExecutor(max_workers=len(named_indexes) or 1) as executor:
+            futures = [executor.submit(self.save_index_to_json, index, os.path.join(output_dir, f'{name}.json'))
+                       for name, index in named_indexes]
+            # result() re-raises the first write error, if any
+            for future in futures:
+                future.result()
 
     def load_index_from_json(self, filename: str) -> Dict:
         """Load index from JSON file."""
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filename, 'rb') as f:
+            return _json_loads(f.read())
+
+    def save_aggregated_indexes(self, named_indexes: List[Tuple[str, Any]], filename: str,
+                                manifest_filename: str):
+        """Write indexes back to back into one file, with a manifest of their (offset, length)."""
+        manifest = {}
+        with open(filename, 'wb') as f:
+            for name, index in named_indexes:
+                blob = _json_dumps(index)
+                manifest[name] = [f.tell(), len(blob)]
+                f.write(blob)
+
+        # The manifest is written last, once every index is in place
+        self.save_index_to_json(manifest, manifest_filename)
+
+    def load_aggregated_index(self, name: str, filename: str, manifest_filename: str) -> Any:
+        """Load one index from an aggregated file, reading only its region through mmap."""
+        offset, length = self.load_index_from_json(manifest_filename)[name]
+        with open(filename, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return _json_loads(view[offset:offset + length])
+
+    def load_position_index(self, filename: str, urls_filename: str) -> Dict[str, Dict[str, List[int]]]:
+        """Load a doc-id encoded position index and resolve it back to URLs."""
+        return self.decode_position_index(self.load_index_from_json(filename),
+                                          self.load_index_from_json(urls_filename))
+
+
+def _index_shard(documents: List[Dict[str, Any]]) -> Tuple[Tuple[Dict, ...], int, Set[str]]:
+    """Index one shard of documents in a worker process."""
+    builder = IndexBuilder()
+    return builder._index_documents(documents), builder.document_count, builder.document_urls
 
 
 def main():
@@ -512,10 +859,20 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
 
     try:
-        # Parse JSONL file
-        print(f"Parsing {input_file}...")
-        documents = builder.parse_jsonl(input_file)
-        print(f"Loaded {len(documents)} documents\n")
+        # Stream the JSONL file through a single indexing pass
+        print(f"Parsing and indexing {input_file}...")
+        (brand_index, origin_index, title_index, description_index, reviews_index,
+         material_index, size_index, color_index, category_index, price_index,
+         features_index) = builder.build_all_indexes(builder.iter_jsonl(input_file),
+                                                     workers=os.cpu_count() or 1)
+        print(f"Indexed {builder.document_count} documents\n")
+
+        # Indexes to write, as (name, index); saved together once all are ready
+        outputs = []
+
+        # Position indexes reference documents by id; urls.json maps ids back to URLs
+        doc_ids = builder.assign_doc_ids(builder.document_urls)
+        outputs.append(('urls', list(doc_ids)))
 
         # ==================== INDEXES PRINCIPAUX ====================
         print("=" * 50)
@@ -523,28 +880,23 @@ def main():
         print("=" * 50)
 
         print("1. Creating brand index...")
-        brand_index = builder.create_brand_index(documents)
-        builder.save_index_to_json(brand_index, os.path.join(output_dir, 'brand_index.json'))
+        outputs.append(('brand_index', brand_index))
         print(f"Brand index created with {len(brand_index)} brands")
 
         print("2. Creating origin index...")
-        origin_index = builder.create_origin_index(documents)
-        builder.save_index_to_json(origin_index, os.path.join(output_dir, 'origin_index.json'))
+        outputs.append(('origin_index', origin_index))
         print(f"Origin index created with {len(origin_index)} origins")
 
         print("3. Creating title position index...")
-        title_index = builder.create_title_position_index(documents)
-        builder.save_index_to_json(title_index, os.path.join(output_dir, 'title_index.json'))
+        outputs.append(('title_index', builder.encode_position_index(title_index, doc_ids)))
         print(f"Title index created with {len(title_index)} tokens")
 
         print("4. Creating description position index...")
-        description_index = builder.create_description_position_index(documents)
-        builder.save_index_to_json(description_index, os.path.join(output_dir, 'description_index.json'))
+        outputs.append(('description_index', builder.encode_position_index(description_index, doc_ids)))
         print(f"Description index created with {len(description_index)} tokens")
 
         print("5. Creating reviews index...")
-        reviews_index = builder.create_reviews_index(documents)
-        builder.save_index_to_json(reviews_index, os.path.join(output_dir, 'reviews_index.json'))
+        outputs.append(('reviews_index', reviews_index))
         print(f"Reviews index created with {len(reviews_index)} products")
 
         # ==================== FEATURES SUPPLÉMENTAIRES ====================
@@ -553,49 +905,54 @@ def main():
         print("=" * 50)
 
         print("6. Creating material index...")
-        material_index = builder.create_material_index(documents)
-        builder.save_index_to_json(material_index, os.path.join(output_dir, 'material_index.json'))
+        outputs.append(('material_index', material_index))
         print(f"Material index created with {len(material_index)} materials")
 
         print("7. Creating size index...")
-        size_index = builder.create_size_index(documents)
-        builder.save_index_to_json(size_index, os.path.join(output_dir, 'size_index.json'))
+        outputs.append(('size_index', size_index))
         print(f"Size index created with {len(size_index)} sizes")
 
         print("8. Creating color index...")
-        color_index = builder.create_color_index(documents)
-        builder.save_index_to_json(color_index, os.path.join(output_dir, 'color_index.json'))
+        outputs.append(('color_index', color_index))
         print(f"Color index created with {len(color_index)} colors")
 
         print("9. Creating category index...")
-        category_index = builder.create_category_index(documents)
-        builder.save_index_to_json(category_index, os.path.join(output_dir, 'category_index.json'))
+        outputs.append(('category_index', category_index))
         print(f"Category index created with {len(category_index)} categories")
 
         print("10. Creating price range index...")
-        price_index = builder.create_price_range_index(documents)
-        builder.save_index_to_json(price_index, os.path.join(output_dir, 'price_index.json'))
+        outputs.append(('price_index', price_index))
         print(f"Price range index created with 3 price ranges")
 
         print("11. Creating special features index...")
-        features_index = builder.create_features_index(documents)
-        builder.save_index_to_json(features_index, os.path.join(output_dir, 'features_index.json'))
+        outputs.append(('features_index', features_index))
         print(f"Special features index created with {len(features_index)} features")
 
+        if _AGGREGATE_OUTPUT:
+            builder.save_aggregated_indexes(outputs, os.path.join(output_dir, 'indexes.bin'),
+                                            os.path.join(output_dir, 'manifest.json'))
+        else:
+            builder.save_indexes_to_json(outputs, output_dir)
+
         # ==================== RÉSUMÉ ====================
         print("\n" + "=" * 50)
         print("RÉSUMÉ DE L'INDEXATION")
         print("=" * 50)
-        print(f"✓ Total documents traités : {len(documents)}")
+        print(f"✓ Total documents traités : {builder.document_count}")
         print(f"✓ Total index générés : 11")
         print(f"✓ Fichiers sauvegardés dans : {output_dir}/")
         print("\nListe des fichiers générés :")
+        if _AGGREGATE_OUTPUT:
+            print("  - indexes.bin (tous les index, un bloc JSON par index)")
+            print("  - manifest.json (position et taille de chaque index dans indexes.bin)")
+            print("\nIndex contenus :")
         print("  [INDEXES PRINCIPAUX]")
         print("  - brand_index.json")
         print("  - origin_index.json")
         print("  - title_index.json")
         print("  - description_index.json")
         print("  - reviews_index.json")
+        print("  - urls.json")
         print("\n  [FEATURES SUPPLÉMENTAIRES]")
         print("  - material_index.json")
         print("  - size_index.json")